@@ -2,45 +2,164 @@
 """ split_tests.py
 
     Determine the golang tests to run based on the shard.
+
+    Packages are balanced across shards using the per-package test durations
+    recorded in pkg_timings.json. To refresh the timings, pipe the output of
+    `go test -json ./...` into `split_tests.py --record-timings`.
+
+    The checked-in timings are placeholders, not measurements: the four
+    packages that used to be hand-picked for shard 0 are given a nominal
+    600s each. Nothing refreshes them automatically yet, so regenerate them
+    as described in .github/CONTRIBUTING.md.
 """
 
+import functools
+import hashlib
+import json
+import os
 import subprocess
 import sys
+import tempfile
+
+# Per-package test durations (in seconds) used to balance the shards. See the
+# module docstring: the checked-in values are placeholders.
+TIMINGS_PATH = os.path.join(os.path.dirname(__file__), 'pkg_timings.json')
 
-# Packages to put in shard 0. Everything else will be in shard 1.
-#
-# These were chosen by hand by looking at recent test runs and picking
-# out packages that were particularly slow to test.
-SHARD0_PACKAGES = set([
-    'github.com/airplanedev/cli/pkg/build/node/nodetest',
-    'github.com/airplanedev/cli/pkg/build/python/pythontest',
-    'github.com/airplanedev/cli/pkg/build/shell/shelltest',
-    'github.com/airplanedev/cli/pkg/build/views/viewstest',
-])
+# Duration assumed for packages that have no recorded timing yet.
+DEFAULT_DURATION = 10.0
+
+# Directory used to cache the output of `go list`. In CI, this is persisted
+# across runs with actions/cache.
+CACHE_DIR = os.path.join(
+    os.environ.get('RUNNER_TEMP', tempfile.gettempdir()),
+    'split_tests_cache',
+)
 
 
 def main():
-    if len(sys.argv) != 2:
-        raise Exception('Usage: test_split.py [shard]')
+    if len(sys.argv) == 2 and sys.argv[1] == '--record-timings':
+        record_timings(sys.stdin)
+        return
+
+    if len(sys.argv) != 3:
+        raise Exception('Usage: test_split.py [shard] [total shards]')
+
+    shard = int(sys.argv[1])
+    total = int(sys.argv[2])
+    if not 0 <= shard < total:
+        raise Exception(f'Shard must be in [0, {total}): got {shard}')
+
+    print(' '.join(sorted(split_packages(total)[shard])))
+
+
+def split_packages(total):
+    """ Partitions all packages into `total` shards with roughly equal test
+        durations, using the longest-processing-time-first heuristic: assign
+        the slowest remaining package to the currently lightest shard.
+    """
+    timings = load_timings()
+    packages = sorted(
+        all_packages(),
+        key=lambda p: (-timings.get(p, DEFAULT_DURATION), p),
+    )
 
-    shard = sys.argv[1]
+    shards = [[] for _ in range(total)]
+    loads = [0.0] * total
+    for package in packages:
+        # Ties are broken by shard index so that every runner computes the
+        # same partition.
+        i = min(range(total), key=lambda i: (loads[i], i))
+        shards[i].append(package)
+        loads[i] += timings.get(package, DEFAULT_DURATION)
+    return shards
 
-    if shard == '0':
-        print(' '.join(sorted(list(SHARD0_PACKAGES))))
-    else:
-        packages_to_test = []
 
-        for package in all_packages():
-            if package not in SHARD0_PACKAGES:
-                packages_to_test.append(package)
+def load_timings():
+    if not os.path.exists(TIMINGS_PATH):
+        return {}
+    with open(TIMINGS_PATH) as f:
+        return json.load(f)
 
-        print(' '.join(packages_to_test))
 
+def record_timings(events):
+    """ Merges the per-package durations from a stream of `go test -json`
+        events into TIMINGS_PATH. Packages absent from the stream keep their
+        previously recorded durations.
+    """
+    timings = load_timings()
+    for line in events:
+        try:
+            event = json.loads(line)
+        except ValueError:
+            # go test may interleave non-JSON output (e.g. build errors).
+            continue
+        # Package-level results are the pass/fail events without a Test field.
+        if event.get('Action') in ('pass', 'fail') and 'Test' not in event:
+            timings[event['Package']] = round(event.get('Elapsed', 0), 1)
 
+    with open(TIMINGS_PATH, 'w') as f:
+        json.dump(timings, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+@functools.lru_cache(maxsize=1)
 def all_packages():
-    result = subprocess.check_output('go list ./...', shell=True)
-    rows = result.decode('utf-8').split('\n')
-    return [row.strip() for row in rows if row.strip() != '']
+    """ Returns the import path of every package in the module. The result is
+        memoized so repeated calls do not re-run `go list`.
+    """
+    return tuple(stream_packages())
+
+
+def stream_packages():
+    """ Yields the import path of every package in the module. Paths are
+        streamed from `go list` as it produces them.
+    """
+    cache_path = os.path.join(CACHE_DIR, cache_key() + '.txt')
+    if os.path.exists(cache_path):
+        with open(cache_path) as f:
+            yield from f.read().splitlines()
+        return
+
+    # Use -find since we only need package paths: this skips resolving imports.
+    args = ['go', 'list', '-find', './...']
+    # go list is short-lived, so garbage collection is pure overhead.
+    env = {**os.environ, 'GOGC': 'off'}
+    packages = []
+    with subprocess.Popen(args, stdout=subprocess.PIPE, text=True, env=env) as proc:
+        for row in proc.stdout:
+            package = row.strip()
+            if package != '':
+                packages.append(package)
+                yield package
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, args)
+
+    # Write to a temporary file first so that a concurrent reader never sees
+    # a partially written cache entry.
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR)
+    with os.fdopen(fd, 'w') as f:
+        f.write('\n'.join(packages))
+    os.replace(tmp_path, cache_path)
+
+
+def cache_key():
+    """ Returns a key that changes whenever the output of `go list` may change:
+        the module's dependencies or the set of directories containing Go files.
+    """
+    h = hashlib.sha256()
+    for name in ['go.mod', 'go.sum']:
+        with open(name, 'rb') as f:
+            h.update(f.read())
+    for root, dirs, files in os.walk('.'):
+        # Skip hidden directories (e.g. .git) and those ignored by `go list`.
+        dirs[:] = sorted(
+            d for d in dirs
+            if not d.startswith(('.', '_')) and d not in ('testdata', 'node_modules')
+        )
+        if any(f.endswith('.go') for f in files):
+            h.update(root.encode('utf-8') + b'\n')
+    return h.hexdigest()
 
 
 if __name__ == '__main__':
@@ -1,67 +1,114 @@
 # This file includes a shim that will execute your task code.
 
+import sys
+
+{{if .Universal}}
+USAGE = "usage: python ./shim.py <entrypoint> <entrypointFunc> <args>"
+NUM_ARGS = 4
+{{else}}
+USAGE = "usage: python ./shim.py <args>"
+NUM_ARGS = 2
+{{end}}
+
+# Validate the arguments before importing anything else, so that a bad invocation fails fast.
+if __name__ == "__main__" and len(sys.argv) != NUM_ARGS:
+    print(USAGE, file=sys.stderr)
+    try:
+        import airplane
+
+        airplane.set_output(USAGE, "error")
+    except ModuleNotFoundError:
+        # airplanesdk is not installed so we can't set the output.
+        pass
+    sys.exit(1)
+
 try:
     import airplane
 except ModuleNotFoundError:
     pass
+try:
+    # Prefer orjson, if the task installed it, since it parses parameters much faster.
+    import orjson
+except ModuleNotFoundError:
+    orjson = None
 import importlib.util as util
-import inspect
 import json
 import os
-import sys
-import traceback
 
 
-def run(args):
-    sys.path.append("{{.TaskRoot}}")
+def dumps_indented(obj):
+    if orjson:
+        try:
+            return orjson.dumps(
+                obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+            ).decode()
+        except TypeError:
+            # orjson is stricter than json (e.g. about integer sizes).
+            pass
+    return json.dumps(obj, indent=2)
 
-    if len(args) != 2:
-        err_msg = "usage: python ./shim.py <args>"
-        print(err_msg, file=sys.stderr)
-        airplane.set_output(err_msg, "error")
-        sys.exit(1)
 
+def run(args):
     os.chdir("{{.TaskRoot}}")
+    sys.path.append("{{.TaskRoot}}")
 
-    {{if .EntrypointFunc}}
-    module_name = "mod.{{.EntrypointFunc}}"
+    {{if .Universal}}
+    entrypoint = args[1]
+    entrypointFunc = args[2]
+    params = args[3]
     {{else}}
-    module_name = "mod.main"
+    entrypoint = "{{.Entrypoint}}"
+    entrypointFunc = "{{.EntrypointFunc}}"
+    params = args[1]
     {{end}}
-    spec = util.spec_from_file_location(module_name, "{{.Entrypoint}}")
+
+    if entrypointFunc:
+        module_name = "mod." + entrypointFunc
+    else:
+        module_name = "mod.main"
+    spec = util.spec_from_file_location(module_name, entrypoint)
     mod = util.module_from_spec(spec)
     spec.loader.exec_module(mod)
 
-    arg_dict = json.loads(args[1])
-    {{if .EntrypointFunc}}
-    ret = mod.{{.EntrypointFunc}}.__airplane.run(arg_dict)
-    {{else}}
-    main_example = """
+    arg_dict = orjson.loads(params) if orjson else json.loads(params)
+    if entrypointFunc:
+        func = getattr(mod, entrypointFunc)
+        ret = func.__airplane.run(arg_dict)
+    else:
+        main_example = """
 ```
 def main(params):
     print(params)
 ```
 """
-    if not hasattr(mod, "main"):
-        raise Exception(f"""Task is missing a `main` function. Add a main function like so and re-deploy:
-{main_example}""")
-    num_params = len(inspect.signature(mod.main).parameters)
-    # If the task doesn't have any parameters
-    if not arg_dict:
-        if num_params == 0:
-            ret = mod.main()
-        elif num_params == 1:
-            ret = mod.main(arg_dict)
-        else:
-            raise Exception(f"""`main` function must have at most 1 parameter, found {num_params}. Update the main function like so and re-deploy:
-{main_example}""")
-    else:
-        if num_params == 1:
-            ret = mod.main(arg_dict)
+        if not hasattr(mod, "main"):
+            raise Exception(
+                f"""Task is missing a `main` function. Add a main function like so and re-deploy:
+{main_example}"""
+            )
+        # inspect is slow to import, so only import it when it's needed.
+        import inspect
+
+        num_params = len(inspect.signature(mod.main).parameters)
+        # If the task doesn't have any parameters
+        if not arg_dict:
+            if num_params == 0:
+                ret = mod.main()
+            elif num_params == 1:
+                ret = mod.main(arg_dict)
+            else:
+                raise Exception(
+                    f"""`main` function must have at most 1 parameter, found {num_params}. Update the main function like so and re-deploy:
+{main_example}"""
+                )
         else:
-            raise Exception(f"""`main` function must have exactly 1 parameter, found {num_params}. Update the main function like so and re-deploy:
-{main_example}""")
-    {{end}}
+            if num_params == 1:
+                ret = mod.main(arg_dict)
+            else:
+                raise Exception(
+                    f"""`main` function must have exactly 1 parameter, found {num_params}. Update the main function like so and re-deploy:
+{main_example}"""
+                )
     if ret is not None:
         try:
             airplane.set_output(ret)
@@ -70,15 +117,21 @@ def main(params):
             # This makes it easier to use the shim in a dev environment. We ensure airplanesdk
             # is installed in production images.
             sys.stdout.flush()
-            print("The airplanesdk package must be installed to set return values as task output.", file=sys.stderr)
+            print(
+                "The airplanesdk package must be installed to set return values as task output.",
+                file=sys.stderr,
+            )
             print("Printing return values to stdout instead.", file=sys.stderr)
             sys.stderr.flush()
-            print(json.dumps(ret, indent=2))
+            print(dumps_indented(ret))
+
 
 if __name__ == "__main__":
     try:
         run(sys.argv)
     except Exception as e:
+        import traceback
+
         print(traceback.format_exc(), file=sys.stderr)
         try:
             airplane.set_output(str(e), "error")
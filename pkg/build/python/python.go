@@ -218,6 +218,8 @@ func Python(
 		{{.Instructions}}
 
 		COPY . .
+		# Precompile the task's entrypoint so that it isn't compiled on every run.
+		RUN python -m compileall -q {{.Entrypoint}}
 		ENV PYTHONUNBUFFERED=1
 		ENTRYPOINT ["python", ".airplane/shim.py"]
 	`)
@@ -226,10 +228,12 @@ func Python(
 		Base         string
 		Args         string
 		Instructions string
+		Entrypoint   string
 	}{
 		Base:         v.String(),
 		Args:         argsCommand,
 		Instructions: dockerfileInstructions,
+		Entrypoint:   entrypoint,
 	})
 	if err != nil {
 		return "", errors.Wrapf(err, "rendering dockerfile")
@@ -343,6 +347,8 @@ func PythonBundle(
 		ENV PYTHONUNBUFFERED=1
 
 		{{if .FilesToDiscover}}
+		# Precompile the task files so that neither discovery nor each run has to compile them.
+		RUN python -m compileall -q {{.FilesToDiscover}}
 		RUN python .airplane-build-tools/inlineParser.py {{.FilesToDiscover}} > airplane-discovery.json
 
 		# Bust the Docker cache to ensure discovered entities are logged.
@@ -371,9 +377,6 @@ func PythonBundle(
 //go:embed python-shim.py
 var pythonShim string
 
-//go:embed universal-python-shim.py
-var universalPythonShim string
-
 type PythonShimParams struct {
 	TaskRoot       string
 	Entrypoint     string
@@ -382,28 +385,35 @@ type PythonShimParams struct {
 
 // PythonShim generates a shim file for running Python tasks.
 func PythonShim(params PythonShimParams) (string, error) {
-	shim, err := utils.ApplyTemplate(pythonShim, struct {
-		TaskRoot       string
-		Entrypoint     string
-		EntrypointFunc string
-	}{
-		TaskRoot:       utils.BackslashEscape(params.TaskRoot, `"`),
-		Entrypoint:     utils.BackslashEscape(params.Entrypoint, `"`),
-		EntrypointFunc: utils.BackslashEscape(params.EntrypointFunc, `"`),
+	return renderPythonShim(pythonShimTemplateParams{
+		TaskRoot:       params.TaskRoot,
+		Entrypoint:     params.Entrypoint,
+		EntrypointFunc: params.EntrypointFunc,
 	})
-	if err != nil {
-		return "", errors.Wrapf(err, "rendering shim")
-	}
-
-	return shim, nil
 }
 
-// UniversalPythonShim generates a shim file for running bundled Python tasks.
+// UniversalPythonShim generates a shim file for running bundled Python tasks. The entrypoint
+// and entrypoint function are read from the shim's arguments rather than being rendered into it.
 func UniversalPythonShim(taskRoot string) (string, error) {
-	shim, err := utils.ApplyTemplate(universalPythonShim, struct {
-		TaskRoot string
-	}{
-		TaskRoot: utils.BackslashEscape(taskRoot, `"`),
+	return renderPythonShim(pythonShimTemplateParams{
+		TaskRoot:  taskRoot,
+		Universal: true,
+	})
+}
+
+type pythonShimTemplateParams struct {
+	TaskRoot       string
+	Entrypoint     string
+	EntrypointFunc string
+	Universal      bool
+}
+
+func renderPythonShim(params pythonShimTemplateParams) (string, error) {
+	shim, err := utils.ApplyTemplate(pythonShim, pythonShimTemplateParams{
+		TaskRoot:       utils.BackslashEscape(params.TaskRoot, `"`),
+		Entrypoint:     utils.BackslashEscape(params.Entrypoint, `"`),
+		EntrypointFunc: utils.BackslashEscape(params.EntrypointFunc, `"`),
+		Universal:      params.Universal,
 	})
 	if err != nil {
 		return "", errors.Wrapf(err, "rendering shim")
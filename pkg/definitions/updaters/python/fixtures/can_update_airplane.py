@@ -55,3 +55,9 @@ def template():
 )
 def good():
     pass
+
+
+# The slug is split across implicitly concatenated strings.
+@airplane.task(slug="concatenated_" "slug")
+def concatenated():
+    pass
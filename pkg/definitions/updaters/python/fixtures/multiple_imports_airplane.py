@@ -0,0 +1,7 @@
+import airplane
+from typing_extensions import Literal, Annotated
+
+
+@airplane.task()
+def my_task():
+    pass
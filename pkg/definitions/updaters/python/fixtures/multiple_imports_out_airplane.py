@@ -0,0 +1,7 @@
+import airplane
+from typing_extensions import Literal, Annotated
+
+
+@airplane.task()
+def my_task(name: Annotated[str, airplane.ParamConfig(name="User name")]):
+    pass
@@ -4,6 +4,7 @@ import airplane
 @airplane.task(
     constraints={
         "a_valid_identifier": "...",
+        "back\\slash": "C:\\path",
         "both'\"'\"": "'\"'\"",
         'double"': '"',
         "single'": "'",
@@ -1,55 +1,75 @@
 import ast
 import dataclasses
+from typing import List
 
 from typing_extensions import Self
 
 
-@dataclasses.dataclass()
-class Location:
-    """Represents a range within a given string of content. The indexes are 0-based in
-    the form of [start, end)."""
+class LineIndex:
+    """Splits content into lines once so that offsets into it can be computed without
+    re-scanning the content."""
 
-    start: int
-    end: int
+    def __init__(self, content: str) -> None:
+        self.lines: List[str] = content.split("\n")
+        # The 0-based offset of the start of each line, plus a trailing entry for the
+        # offset just past the end of the last line.
+        self.starts: List[int] = [0]
+        for line in self.lines:
+            # Add one to account for the newline at the end of the line.
+            self.starts.append(self.starts[-1] + len(line) + 1)
 
-    @classmethod
-    def offset(cls, content: str, lineno: int, col_offset: int) -> int:
+    def offset(self, lineno: int, col_offset: int) -> int:
         """Generates the 0-based offset into content given a 0-based line number
         and column offset."""
-        lines = content.split("\n")
-        offset = 0
-        for i in range(lineno):
-            # Add one to account for the newline at the end of the line.
-            offset += len(lines[i]) + 1
-        return offset + col_offset
-
-    @classmethod
-    def from_node(cls, node: ast.AST, content: str) -> Self:
-        """Generates a Location from an AST node."""
-        assert node.end_lineno
-        assert node.end_col_offset
+        return self.starts[lineno] + col_offset
 
+    def node_offset(self, lineno: int, col_offset: int) -> int:
+        """Generates the 0-based offset into content given an AST node's 1-based line
+        number and utf-8 column offset."""
         # Note: lineno/col_offset are 1-based indexes. Subtract 1 to account for that.
-        lineno = node.lineno - 1
-        end_lineno = node.end_lineno - 1
-        col_offset = node.col_offset - 1
-        end_col_offset = node.end_col_offset - 1
+        lineno -= 1
+        col_offset -= 1
 
-        # The col_offset and end_col_offset values are based on utf-8 byte length, e.g.
+        # The col_offset values are based on utf-8 byte length, e.g.
         # >>> len('你'.encode('utf-8'))
         # 3
         # >>> len('你')
         # 1
         # Standardize on string length.
-        def to_string_len(lineno: int, col_offset: int) -> int:
-            lines = content.split("\n")
-            s = lines[lineno].encode("utf-8")[0 : col_offset + 1]
-            return len(s.decode("utf-8"))
+        return self.offset(lineno, self.to_string_len(lineno, col_offset))
 
-        col_offset = to_string_len(lineno, col_offset)
-        end_col_offset = to_string_len(end_lineno, end_col_offset)
+    def to_string_len(self, lineno: int, col_offset: int) -> int:
+        """Returns the number of characters in the first col_offset+1 bytes of the
+        utf-8 encoding of a 0-based line."""
+        line = self.lines[lineno]
+        n = col_offset + 1
+        if line.isascii():
+            return min(n, len(line))
+        # Walk the line until we've consumed n bytes of its utf-8 encoding.
+        size = 0
+        for i, c in enumerate(line):
+            if size >= n:
+                return i
+            o = ord(c)
+            size += 1 if o < 0x80 else 2 if o < 0x800 else 3 if o < 0x10000 else 4
+        return len(line)
+
+
+@dataclasses.dataclass()
+class Location:
+    """Represents a range within a given string of content. The indexes are 0-based in
+    the form of [start, end)."""
+
+    start: int
+    end: int
+
+    @classmethod
+    def from_node(cls, node: ast.AST, index: LineIndex) -> Self:
+        """Generates a Location from an AST node."""
+        assert node.end_lineno
+        assert node.end_col_offset
 
         return cls(
-            cls.offset(content, lineno, col_offset),
-            cls.offset(content, end_lineno, end_col_offset),
+            index.node_offset(node.lineno, node.col_offset),
+            index.node_offset(node.end_lineno, node.end_col_offset),
         )
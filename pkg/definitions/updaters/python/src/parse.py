@@ -1,9 +1,27 @@
 import ast
-from typing import List, Optional, Union
+import itertools
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
-from location import Location
+from location import LineIndex, Location
 from utils import Imports
 
+_AIRPLANE_NAME = re.compile(r"\bairplane\b")
+_TASK_NAME = re.compile(r"\btask\b")
+
+
+def may_contain_task(content: str) -> bool:
+    """Returns false if content certainly has no @airplane.task decorator, which lets
+    callers skip parsing it."""
+    if not content.isascii():
+        # Non-ASCII identifiers are NFKC-normalized by the parser, so they could still
+        # spell out `airplane` or `task`.
+        return True
+    return (
+        _AIRPLANE_NAME.search(content) is not None
+        and _TASK_NAME.search(content) is not None
+    )
+
 
 # Note: The Python AST module does not include comments, but we could extract them using
 # either of the following libraries (which are recommended in the official Python AST docs):
@@ -19,6 +37,7 @@ class Parser(ast.NodeVisitor):
     def __init__(self, slug: str, content: str):
         self._slug = slug
         self._content = content
+        self._index = LineIndex(content)
         # Track if the parser is currently traversing within a class.
         self._current_class: Optional[ast.ClassDef] = None
 
@@ -28,17 +47,39 @@ class Parser(ast.NodeVisitor):
         self.func_name: Optional[str] = None
         self.is_async = False
 
+        # NodeVisitor.visit looks up the visitor method by name for every node, so
+        # dispatch through a table instead.
+        self._visitors: Dict[type, Callable[[Any], None]] = {
+            ast.ClassDef: self.visit_ClassDef,
+            ast.Import: self.visit_Import,
+            ast.ImportFrom: self.visit_ImportFrom,
+            ast.FunctionDef: self.visit_FunctionDef,
+            ast.AsyncFunctionDef: self.visit_AsyncFunctionDef,
+        }
+
+    def visit(self, node: ast.AST) -> None:
+        self._visitors.get(type(node), self.generic_visit)(node)
+
+    def generic_visit(self, node: ast.AST) -> None:
+        for child in ast.iter_child_nodes(node):
+            # Imports and function definitions are statements, which can't be nested
+            # within expressions, so there's no need to traverse those.
+            if not isinstance(child, ast.expr):
+                self.visit(child)
+
     def visit_ClassDef(self, node: ast.ClassDef) -> None:
         self._current_class = node
-        super().generic_visit(node)
+        self.generic_visit(node)
         self._current_class = None
 
     def visit_Import(self, node: ast.Import) -> None:
-        self.imports.add(node.names[0].name)
+        for alias in node.names:
+            self.imports.add(alias.name)
 
     def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
         assert node.module is not None
-        self.imports.add(node.module, node.names[0].name)
+        for alias in node.names:
+            self.imports.add(node.module, alias.name)
 
     def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
         self._generic_visit_func_def(node)
@@ -57,7 +98,7 @@ class Parser(ast.NodeVisitor):
 
         # Compute the location of the function definition. This includes the entire function from
         # `def...` up to and including the closing parenthesis for the arg list.
-        func_loc = Location.from_node(func, self._content)
+        func_loc = Location.from_node(func, self._index)
         # We have to compute the arg length. Note that we can't compute the end based on the
         # location of the return type (it may not be present) nor the first line of the body
         # (there may be comments before that line, which are not included in the AST).
@@ -73,19 +114,27 @@ class Parser(ast.NodeVisitor):
         args.extend(func.args.args)
         args.extend(func.args.posonlyargs)
         args.extend(func.args.kwonlyargs)
-        args.extend(func.args.defaults)
-        args.extend(defaults)
         args.extend([a for a in [func.args.vararg, func.args.kwarg] if a is not None])
-        for arg in args:
-            loc = Location.from_node(arg, self._content)
-            args_start = min(args_start, loc.start)
-            args_end = max(args_end, loc.end)
+        # Find the extent of the args by comparing their raw (lineno, col_offset) positions.
+        # Byte offsets preserve ordering within a line, so only the first and last
+        # positions need to be converted into offsets.
+        first: Optional[Tuple[int, int]] = None
+        last: Optional[Tuple[int, int]] = None
+        for arg in itertools.chain(args, defaults):
+            assert arg.end_lineno
+            assert arg.end_col_offset
+            start = (arg.lineno, arg.col_offset)
+            end = (arg.end_lineno, arg.end_col_offset)
+            first = start if first is None else min(first, start)
+            last = end if last is None else max(last, end)
+        if first is not None and last is not None:
+            args_start = min(args_start, self._index.node_offset(*first))
+            args_end = max(args_end, self._index.node_offset(*last))
 
         # There may be a trailing comma after the last arg. We need to include that in args_end.
-        for i in range(args_end, len(self._content)):
-            if self._content[i] == ")":
-                args_end = i
-                break
+        close = self._content.find(")", args_end)
+        if close != -1:
+            args_end = close
         self.func_def_loc = Location(func_loc.start, args_end + len(")"))
 
         # Check if this function has the @airplane.task decorator with a matching slug.
@@ -98,7 +147,7 @@ class Parser(ast.NodeVisitor):
         if self._has_computed_fields(dec, defaults):
             raise ValueError("Tasks that use computed fields must be updated manually.")
 
-        self.decorator_loc = Location.from_node(dec, self._content)
+        self.decorator_loc = Location.from_node(dec, self._index)
         # The dec node is a Call (airplane.task(...)) so it does not include the leading
         # @ for the decorator. Include this in decorator_loc:
         self.decorator_loc.start -= 1
@@ -108,13 +157,15 @@ class Parser(ast.NodeVisitor):
         self, node: Union[ast.FunctionDef, ast.AsyncFunctionDef]
     ) -> Optional[ast.Call]:
         for dec in node.decorator_list:
+            if not isinstance(dec, ast.Call):
+                continue
+            f = dec.func
             if (
-                not isinstance(dec, ast.Call)
-                or not isinstance(dec.func, ast.Attribute)
-                or not isinstance(dec.func.value, ast.Name)
+                isinstance(f, ast.Attribute)
+                and f.attr == "task"
+                and isinstance(f.value, ast.Name)
+                and f.value.id == "airplane"
             ):
-                continue
-            if dec.func.value.id == "airplane" and dec.func.attr == "task":
                 return dec
         return None
 
@@ -131,32 +182,17 @@ class Parser(ast.NodeVisitor):
 
     def _has_computed_fields(self, call: ast.Call, defaults: List[ast.expr]) -> bool:
         """Returns true if the ast nodes contain only literal values."""
-        p = ComputedFieldsParser()
-        for k in call.keywords:
-            p.visit(k.value)
-        for d in defaults:
-            p.visit(d)
-        return p.has_computed
-
-
-class ComputedFieldsParser(ast.NodeVisitor):
-    def __init__(self) -> None:
-        self.has_computed = False
-
-    def visit_Constant(self, node: ast.Constant) -> None:
-        pass
-
-    def visit_List(self, node: ast.List) -> None:
-        pass
-
-    def visit_Dict(self, node: ast.Dict) -> None:
-        pass
-
-    def visit_JoinedStr(self, node: ast.JoinedStr) -> None:
-        for v in node.values:
-            if not isinstance(v, ast.Constant):
-                self.has_computed = True
-
-    def generic_visit(self, node: ast.AST) -> None:
-        self.has_computed = True
-        print("Found computed node", node)
+        for node in itertools.chain((k.value for k in call.keywords), defaults):
+            if _is_computed(node):
+                return True
+        return False
+
+
+def _is_computed(node: ast.expr) -> bool:
+    """Returns true if the node is not a literal value. The contents of lists and dicts
+    are not inspected."""
+    if isinstance(node, (ast.Constant, ast.List, ast.Dict)):
+        return False
+    if isinstance(node, ast.JoinedStr):
+        return any(not isinstance(v, ast.Constant) for v in node.values)
+    return True
@@ -0,0 +1,492 @@
+"""
+A lightweight formatter for the code generated by the serializer.
+
+Formatting a snippet with black requires parsing it with lib2to3 first, which dominates
+the runtime of an update. The serializer only generates a handful of simple statements
+(the @airplane.task decorator, function signatures and imports), so this module
+implements the subset of black's line splitting that applies to them. Its output is
+identical to black's (with the default mode) for that subset. Anything else is rejected
+with a ValueError so that callers can fall back to black.
+"""
+
+import dataclasses
+import keyword
+import re
+from typing import Dict, FrozenSet, Iterator, List, Optional, Set, Tuple
+
+LINE_LENGTH = 88
+
+_OPENING_BRACKETS = {"(": ")", "[": "]", "{": "}"}
+_CLOSING_BRACKETS = {")", "]", "}"}
+# Names after which an opening bracket starts a new atom rather than a trailer.
+_KEYWORDS = {"and", "else", "if", "import", "in", "is", "not", "or", "return"}
+
+# Delimiter priorities, mirroring black's.
+_COMMA_PRIORITY = 18
+_VBAR_PRIORITY = 9
+_DOT_PRIORITY = 1
+
+_STRING = "string"
+_NUMBER = "number"
+_NAME = "name"
+_OP = "op"
+
+_TOKEN_RE = re.compile(
+    r"""
+    [ ]*(?:
+        (?P<string>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+        |(?P<number>-?[0-9]+(?:\.[0-9]*)?(?:[eE][-+]?[0-9]+)?(?![\w.]))
+        |(?P<name>[^\W\d]\w*)
+        |(?P<op>[()\[\]{},:=.|@])
+    )
+    """,
+    re.VERBOSE,
+)
+
+
+@dataclasses.dataclass
+class _Token:
+    kind: str
+    value: str
+    # Whitespace before this token, if it isn't the first token of a line.
+    prefix: str = ""
+    # Whether this is an opening bracket of a literal (e.g. a list) rather than of a
+    # call or subscript.
+    is_atom: bool = False
+
+
+class _CannotSplit(Exception):
+    """Raised when a line cannot be split by a transform."""
+
+
+class _Line:
+    __slots__ = ("tokens", "depth", "inside_brackets", "should_split")
+
+    def __init__(
+        self, tokens: List[_Token], depth: int, inside_brackets: bool = False
+    ) -> None:
+        self.tokens = tokens
+        self.depth = depth
+        self.inside_brackets = inside_brackets
+        # Whether the line should be exploded one element per line, even if it fits.
+        self.should_split = False
+
+    def __str__(self) -> str:
+        first, *rest = self.tokens
+        return (
+            "    " * self.depth
+            + first.value
+            + "".join(tok.prefix + tok.value for tok in rest)
+        )
+
+    @property
+    def is_def(self) -> bool:
+        values = [tok.value for tok in self.tokens[:2]]
+        return values[:1] == ["def"] or values == ["async", "def"]
+
+
+def _track_brackets(tokens: List[_Token]) -> Tuple[Dict[int, int], Dict[int, int]]:
+    """Returns the bracket pairs and delimiters of a line, relative to the start of the
+    line: a map from the index of each closing bracket to the index of its opening
+    bracket, and a map from the index of each delimiter at depth 0 to its priority."""
+    matches: Dict[int, int] = {}
+    delimiters: Dict[int, int] = {}
+    stack: List[int] = []
+    previous: Optional[int] = None
+    for i, tok in enumerate(tokens):
+        if tok.value in _CLOSING_BRACKETS:
+            if not stack:
+                # The opening bracket is on a prior line.
+                continue
+            matches[i] = stack.pop()
+        if not stack:
+            if tok.value == "|" and previous is not None:
+                delimiters[previous] = _VBAR_PRIORITY
+            elif (
+                tok.value == "."
+                and previous is not None
+                and tokens[previous].value in _CLOSING_BRACKETS
+            ):
+                delimiters[previous] = _DOT_PRIORITY
+            elif tok.value == ",":
+                delimiters[i] = _COMMA_PRIORITY
+        if tok.value in _OPENING_BRACKETS:
+            stack.append(i)
+        previous = i
+    return matches, delimiters
+
+
+def _max_priority(delimiters: Dict[int, int], exclude: Optional[int] = None) -> int:
+    """Returns the highest delimiter priority, ignoring the token at `exclude`.
+
+    Raises ValueError if there are no delimiters."""
+    return max(p for i, p in delimiters.items() if i != exclude)
+
+
+def format_code(code: str) -> str:
+    """
+    Formats a chunk of Python code, as black would. Each line of the code must be a full
+    statement. Raises ValueError if the code contains anything unsupported.
+    """
+    out = []
+    for line in code.split("\n"):
+        stripped = line.lstrip(" ")
+        indent = len(line) - len(stripped)
+        if indent % 4 != 0:
+            raise ValueError(f"unsupported indentation: {line!r}")
+        tokens = _tokenize(stripped)
+        if not tokens:
+            raise ValueError("unsupported blank line")
+        parsed = _Line(tokens, indent // 4)
+        if tokens[0].value in ("import", "from") and len(str(parsed)) > LINE_LENGTH:
+            # Black wraps long imports in parentheses, which isn't implemented here.
+            raise ValueError(f"unsupported import: {line!r}")
+        out.extend(_transform_line(parsed))
+    return "\n".join(out)
+
+
+def _tokenize(code: str) -> List[_Token]:
+    tokens: List[_Token] = []
+    pos = 0
+    while pos < len(code.rstrip(" ")):
+        m = _TOKEN_RE.match(code, pos)
+        if not m or m.lastgroup is None:
+            raise ValueError(f"unsupported code: {code[pos:]!r}")
+        value = m.group(m.lastgroup)
+        if m.lastgroup == _STRING:
+            value = _normalize_string_quotes(value)
+        elif m.lastgroup == _NUMBER:
+            value = _normalize_number(value)
+        tokens.append(_Token(m.lastgroup, value))
+        pos = m.end()
+    for i, tok in enumerate(tokens):
+        if tok.value == "@" and i != 0:
+            raise ValueError("unsupported use of @")
+        if tok.kind == _NAME and not _is_valid_name(tokens, i):
+            # For example, a parameter named after a keyword. Black rejects these.
+            raise ValueError(f"unsupported use of keyword: {tok.value!r}")
+    _set_whitespace(tokens)
+    return tokens
+
+
+def _is_valid_name(tokens: List[_Token], i: int) -> bool:
+    value = tokens[i].value
+    if not keyword.iskeyword(value):
+        return True
+    first = tokens[0].value
+    if value in ("None", "True", "False"):
+        # These can't be bound (e.g. as a parameter name).
+        binding = (i == 0 or tokens[i - 1].value in ("(", ",")) and (
+            i + 1 < len(tokens) and tokens[i + 1].value in ("=", ":")
+        )
+        return not binding
+    return (
+        (value in ("async", "def", "from", "import") and i == 0)
+        or (value == "def" and i == 1 and first == "async")
+        or (value == "import" and first == "from")
+        or (value == "pass" and len(tokens) == 1)
+    )
+
+
+def _set_whitespace(tokens: List[_Token]) -> None:
+    """Sets the whitespace prefix of each token, following black's rules."""
+    # For each open bracket: whether it holds the parameters of a function definition,
+    # and whether the current parameter is annotated.
+    brackets: List[List[bool]] = []
+    prev: Optional[_Token] = None
+    for i, tok in enumerate(tokens):
+        value = tok.value
+        # Calls and subscripts.
+        is_trailer = (
+            prev is not None
+            and value in ("(", "[")
+            and (
+                (prev.kind == _NAME and prev.value not in _KEYWORDS)
+                or prev.value in _CLOSING_BRACKETS
+            )
+        )
+        if prev is not None:
+            # Only annotated parameter defaults are surrounded by spaces.
+            spaced_equals = not brackets or (brackets[-1][0] and brackets[-1][1])
+            tok.prefix = _prefix(prev, tok, is_trailer, spaced_equals)
+
+        if value in _OPENING_BRACKETS:
+            tok.is_atom = not is_trailer
+            is_params = (
+                value == "("
+                and i >= 2
+                and tokens[i - 2].value == "def"
+                and not brackets
+            )
+            brackets.append([is_params, False])
+        elif value in _CLOSING_BRACKETS:
+            if not brackets:
+                raise ValueError("unbalanced brackets")
+            brackets.pop()
+        elif brackets and value == ":":
+            brackets[-1][1] = True
+        elif brackets and value == ",":
+            brackets[-1][1] = False
+        prev = tok
+    if brackets:
+        raise ValueError("unbalanced brackets")
+
+
+def _prefix(prev: _Token, tok: _Token, is_trailer: bool, spaced_equals: bool) -> str:
+    if (
+        is_trailer
+        or tok.value in _CLOSING_BRACKETS
+        or tok.value in (",", ":", ".")
+        or prev.value in _OPENING_BRACKETS
+        or prev.value in (".", "@")
+    ):
+        return ""
+    if tok.value == "=":
+        return " " if spaced_equals else ""
+    if prev.value == "=":
+        return prev.prefix
+    return " "
+
+
+def _normalize_string_quotes(value: str) -> str:
+    """Prefers double quotes, unless that requires more escaping (see black's
+    normalize_string_quotes, for strings without a prefix)."""
+    if value[0] == '"':
+        orig_quote, new_quote = '"', "'"
+    else:
+        orig_quote, new_quote = "'", '"'
+    unescaped_new_quote = re.compile(rf"(([^\\]|^)(\\\\)*){new_quote}")
+    escaped_new_quote = re.compile(rf"([^\\]|^)\\((?:\\\\)*){new_quote}")
+    escaped_orig_quote = re.compile(rf"([^\\]|^)\\((?:\\\\)*){orig_quote}")
+    body = value[1:-1]
+    # Remove unnecessary escapes.
+    new_body = _sub_twice(escaped_new_quote, rf"\1\2{new_quote}", body)
+    if body != new_body:
+        body = new_body
+        value = f"{orig_quote}{body}{orig_quote}"
+    new_body = _sub_twice(escaped_orig_quote, rf"\1\2{orig_quote}", new_body)
+    new_body = _sub_twice(unescaped_new_quote, rf"\1\\{new_quote}", new_body)
+    orig_escape_count = body.count("\\")
+    new_escape_count = new_body.count("\\")
+    if new_escape_count > orig_escape_count:
+        return value
+    if new_escape_count == orig_escape_count and orig_quote == '"':
+        return value
+    return f"{new_quote}{new_body}{new_quote}"
+
+
+def _sub_twice(regex: "re.Pattern[str]", replacement: str, original: str) -> str:
+    # Matches can overlap, so a second pass catches the ones the first pass missed.
+    return regex.sub(replacement, regex.sub(replacement, original))
+
+
+def _normalize_number(value: str) -> str:
+    """Lowercases exponents and adds missing zeros to floats, as black does."""
+    value = value.lower()
+    if "e" in value:
+        before, after = value.split("e")
+        if after.startswith("+"):
+            after = after[1:]
+        return f"{_normalize_float(before)}e{after}"
+    return _normalize_float(value)
+
+
+def _normalize_float(value: str) -> str:
+    if "." not in value:
+        return value
+    before, after = value.split(".")
+    return f"{before or 0}.{after or 0}"
+
+
+def _transform_line(line: _Line) -> List[str]:
+    """Splits a line into lines that fit within LINE_LENGTH, if possible."""
+    line_str = str(line)
+    if not line.should_split and len(line_str) <= LINE_LENGTH:
+        return [line_str]
+
+    if line.is_def:
+        transforms = [_left_hand_split]
+    elif line.inside_brackets:
+        transforms = [_delimiter_split, _right_hand_split_with_omits]
+    else:
+        transforms = [_right_hand_split_with_omits]
+
+    for transform in transforms:
+        result: List[str] = []
+        try:
+            for transformed in transform(line):
+                if str(transformed) == line_str:
+                    raise _CannotSplit("The transform returned an unchanged result")
+                result.extend(_transform_line(transformed))
+        except _CannotSplit:
+            continue
+        return result
+    return [line_str]
+
+
+def _left_hand_split(line: _Line) -> Iterator[_Line]:
+    """Splits a line at its first bracket pair. Only used for function definitions."""
+    matches, _ = _track_brackets(line.tokens)
+    head: List[_Token] = []
+    body: List[_Token] = []
+    tail: List[_Token] = []
+    current = head
+    opening: Optional[int] = None
+    for i, tok in enumerate(line.tokens):
+        if current is body and matches.get(i, -1) == opening:
+            current = tail if body else head
+        current.append(tok)
+        if current is head and tok.value in _OPENING_BRACKETS:
+            opening = i
+            current = body
+    if opening is None:
+        raise _CannotSplit("No brackets found")
+    yield from _bracket_split(line, line.tokens[opening], head, body, tail)
+
+
+def _right_hand_split_with_omits(line: _Line) -> Iterator[_Line]:
+    """Splits a line at its last bracket pair, gluing trailers together (e.g. the
+    `(b)` in `a(b)`) for as long as the first line still fits."""
+    for omit in _generate_trailers_to_omit(line):
+        lines = list(_right_hand_split(line, omit))
+        if len(str(lines[0])) <= LINE_LENGTH:
+            yield from lines
+            return
+    yield from _right_hand_split(line, frozenset())
+
+
+def _right_hand_split(line: _Line, omit: FrozenSet[int]) -> Iterator[_Line]:
+    matches, _ = _track_brackets(line.tokens)
+    head: List[_Token] = []
+    body: List[_Token] = []
+    tail: List[_Token] = []
+    current = tail
+    opening: Optional[int] = None
+    closing: Optional[int] = None
+    for i in reversed(range(len(line.tokens))):
+        tok = line.tokens[i]
+        if current is body and i == opening:
+            current = head if body else tail
+        current.append(tok)
+        if current is tail and tok.value in _CLOSING_BRACKETS and i not in omit:
+            opening = matches.get(i)
+            closing = i
+            current = body
+    if opening is None or closing is None or not head:
+        raise _CannotSplit("No brackets found")
+    head.reverse()
+    body.reverse()
+    tail.reverse()
+    yield from _bracket_split(line, line.tokens[opening], head, body, tail)
+
+
+def _bracket_split(
+    line: _Line,
+    opening: _Token,
+    head: List[_Token],
+    body: List[_Token],
+    tail: List[_Token],
+) -> Iterator[_Line]:
+    if not body:
+        tail_len = len("".join(tok.prefix + tok.value for tok in tail).strip())
+        if tail_len == 0:
+            raise _CannotSplit("Splitting brackets produced the same line")
+        if tail_len < 3:
+            raise _CannotSplit("Splitting brackets on an empty body is not worth it")
+
+    if (
+        body
+        and line.is_def
+        and opening.value == "("
+        and not any(tok.value == "," for tok in body)
+    ):
+        # Add a trailing comma to a lone function parameter.
+        body = body + [_Token(_OP, ",")]
+
+    body_line = _Line(body, line.depth + 1, inside_brackets=True)
+    if body:
+        body_line.should_split = _should_explode(body_line, opening)
+    for result in (_Line(head, line.depth), body_line, _Line(tail, line.depth)):
+        if result.tokens:
+            yield result
+
+
+def _should_explode(line: _Line, opening: _Token) -> bool:
+    """Whether the body of a bracket split should be split one element per line, which
+    is the case for collection literals and trailing commas."""
+    last = len(line.tokens) - 1
+    trailing_comma = line.tokens[last].value == ","
+    try:
+        _, delimiters = _track_brackets(line.tokens)
+        max_priority = _max_priority(delimiters, last if trailing_comma else None)
+    except ValueError:
+        return False
+    return max_priority == _COMMA_PRIORITY and (trailing_comma or opening.is_atom)
+
+
+def _delimiter_split(line: _Line) -> Iterator[_Line]:
+    """Splits a line at its delimiters with the highest priority."""
+    _, delimiters = _track_brackets(line.tokens)
+    last = len(line.tokens) - 1
+    try:
+        priority = _max_priority(delimiters, last)
+    except ValueError:
+        raise _CannotSplit("No delimiters found") from None
+    if priority == _DOT_PRIORITY and list(delimiters.values()).count(priority) == 1:
+        raise _CannotSplit("Splitting a single attribute from its owner looks wrong")
+
+    current: List[_Token] = []
+    for i, tok in enumerate(line.tokens):
+        current.append(tok)
+        if delimiters.get(i) == priority:
+            yield _Line(current, line.depth, line.inside_brackets)
+            current = []
+    if current:
+        if priority == _COMMA_PRIORITY and current[-1].value != ",":
+            current.append(_Token(_OP, ","))
+        yield _Line(current, line.depth, line.inside_brackets)
+
+
+def _generate_trailers_to_omit(line: _Line) -> Iterator[FrozenSet[int]]:
+    """Generates sets of closing brackets that a right hand split should skip over.
+
+    Brackets can be omitted if everything after the preceding closing bracket fits on
+    one line. The sets are cumulative and the first set is empty."""
+    matches, _ = _track_brackets(line.tokens)
+    omit: Set[int] = set()
+    yield frozenset(omit)
+
+    length = 4 * line.depth
+    opening: Optional[int] = None
+    closing: Optional[int] = None
+    inner_brackets: Set[int] = set()
+    for i in reversed(range(len(line.tokens))):
+        tok = line.tokens[i]
+        length += len(tok.value) + (len(tok.prefix) if i > 0 else 0)
+        if length > LINE_LENGTH:
+            break
+
+        prev = line.tokens[i - 1] if i > 0 else None
+        if opening is not None:
+            if i == opening:
+                opening = None
+            elif tok.value in _CLOSING_BRACKETS:
+                if prev and prev.value == ",":
+                    # Never omit bracket pairs with trailing commas.
+                    break
+                inner_brackets.add(i)
+        elif tok.value in _CLOSING_BRACKETS:
+            if prev and prev.value in _OPENING_BRACKETS:
+                # Empty brackets would fail a split, so only omit them along with
+                # another pair of brackets.
+                inner_brackets.add(i)
+                continue
+            if closing is not None:
+                omit.add(closing)
+                omit.update(inner_brackets)
+                inner_brackets.clear()
+                yield frozenset(omit)
+            if prev and prev.value == ",":
+                break
+            opening = matches.get(i)
+            closing = i
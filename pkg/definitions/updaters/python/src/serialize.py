@@ -1,18 +1,46 @@
 import dataclasses
+import functools
 import os
 import re
 import sys
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Union
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Final, List, Optional, Union
 
 import black
-import inflection
 
-from utils import Imports, camel_to_snake, insert_after
+import pretty
+from utils import Imports, camel_to_snake, humanize, insert_after
+
+# Escapes a string for use within a double-quoted Python string.
+_ESCAPE = str.maketrans({'"': '\\"', "\\": "\\\\"})
+
+# Maps parameter types to the Python types that represent them.
+_PY_TYPE_FOR_PARAM: Final = {
+    "shorttext": "str",
+    "longtext": "airplane.LongText",
+    "sql": "airplane.SQL",
+    "boolean": "bool",
+    "integer": "int",
+    "float": "float",
+    "upload": "airplane.File",
+    "date": "date",
+    "datetime": "datetime",
+    "configvar": "airplane.ConfigVar",
+}
+
+_ISO_DATE = re.compile(r"([0-9]{4})-([0-9]{2})-([0-9]{2})")
+_ISO_DATETIME = re.compile(
+    r"([0-9]{4})-([0-9]{2})-([0-9]{2})T([0-9]{2}):([0-9]{2}):([0-9]{2})(?:\.([0-9]{1,6}))?"
+)
+
+# Constructing black's Mode is not free, so share a single instance.
+_BLACK_MODE = black.Mode()
 
 
 @dataclasses.dataclass(frozen=True)
 class SerializedValue:
+    __slots__ = ("value",)
+
     value: str
 
     def __str__(self) -> str:
@@ -20,27 +48,40 @@ class SerializedValue:
 
 
 class Serializer:
+    # Serializer's attributes are fixed, so use slots to avoid per-instance dicts and
+    # speed up attribute access in the (recursive) serialization methods.
+    __slots__ = (
+        "_indent",
+        "_minor_version",
+        "_param_value_serializers",
+        "expected_imports",
+    )
+
     def __init__(self, indent: str, py_version: str):
-        self._indent = indent
-        self._py_version = py_version
-        self.expected_imports = Imports()
+        self._indent: Final = indent
+        self._minor_version: Final = _get_minor_version(py_version)
+        # Serializers for parameter values whose representation depends on their type.
+        self._param_value_serializers: Final[Dict[str, Callable[[Any], str]]] = {
+            "datetime": self._serialize_datetime_value,
+            "date": self._serialize_date_value,
+            "configvar": self._serialize_configvar_value,
+        }
+        self.expected_imports: Final = Imports()
         # "airplane" must always be imported for @airplane.task.
         self.expected_imports.add("airplane")
 
     def serialize_imports(self, existing_imports: Imports) -> str:
         serialized_imports = []
-        keys = list(self.expected_imports.imports.keys())
-        for name in sorted(keys):
+        for name in sorted(self.expected_imports.imports):
             imp = self.expected_imports.imports[name]
-            if imp.direct and not existing_imports.has(name):
+            existing = existing_imports.imports.get(name)
+            if imp.direct and not (existing and existing.direct):
                 serialized_imports.append(f"import {name}")
-            includes = sorted(
-                include
-                for include in imp.includes
-                if not existing_imports.has(name, include)
-            )
-            if len(includes) > 0:
-                serialized_imports.append(f'from {name} import {", ".join(includes)}')
+            includes = imp.includes - existing.includes if existing else imp.includes
+            if includes:
+                serialized_imports.append(
+                    f'from {name} import {", ".join(sorted(includes))}'
+                )
 
         out = "\n".join(serialized_imports)
         return format_code(out, self._indent)
@@ -51,18 +92,14 @@ class Serializer:
         if value is None:
             return "None"
         if isinstance(value, str):
-            # Escape double quotes.
-            return '"' + value.replace('"', '\\"') + '"'
+            return f'"{value.translate(_ESCAPE)}"'
         if isinstance(value, (int, float, bool)):
             return str(value)
         if isinstance(value, list):
-            return "[" + ",".join([self._serialize(elem) for elem in value]) + "]"
+            return "[" + ",".join(map(self._serialize, value)) + "]"
         if isinstance(value, dict):
             kvs = ",".join(
-                [
-                    self._serialize(key) + ": " + self._serialize(value[key])
-                    for key in value
-                ]
+                f"{self._serialize(k)}: {self._serialize(v)}" for k, v in value.items()
             )
             return "{" + kvs + "}"
         raise ValueError(f"unable to serialize value: {value}")
@@ -83,18 +120,7 @@ class Serializer:
         return self._serialize_param_value(opt, param)
 
     def _serialize_parameter(self, param: Dict) -> str:
-        py_type = {
-            "shorttext": "str",
-            "longtext": "airplane.LongText",
-            "sql": "airplane.SQL",
-            "boolean": "bool",
-            "integer": "int",
-            "float": "float",
-            "upload": "airplane.File",
-            "date": "date",
-            "datetime": "datetime",
-            "configvar": "airplane.ConfigVar",
-        }.get(param["type"], None)
+        py_type = _PY_TYPE_FOR_PARAM.get(param["type"], None)
         if py_type is None:
             raise ValueError(f"Unknown parameter type: {param['type']}")
 
@@ -105,7 +131,7 @@ class Serializer:
 
         required = param.get("required", True)
         if not required:
-            if self._is_py_version_gte("3.10"):
+            if self._is_py_version_gte(10):
                 py_type = f"{py_type} | None"
             else:
                 self.expected_imports.add("typing", "Optional")
@@ -116,7 +142,7 @@ class Serializer:
         # If the name can be generated from the slug, don't bother serializing the name.
         conditional_fields: List[str] = []
         slug = param.get("slug", "")
-        if inflection.humanize(slug) == param.get("name", ""):
+        if humanize(slug) == param.get("name", ""):
             conditional_fields.append("name")
         annotated_param = {
             k: param[k]
@@ -131,7 +157,7 @@ class Serializer:
                     SerializedValue(self._serialize_param_option(opt, param))
                     for opt in annotated_param["options"]
                 ]
-            if self._is_py_version_gte("3.9"):
+            if self._is_py_version_gte(9):
                 self.expected_imports.add("typing", "Annotated")
             else:
                 self.expected_imports.add("typing_extensions", "Annotated")
@@ -152,19 +178,17 @@ class Serializer:
 
         # Serialize parameters that do _not_ have defaults first. Optional parameters will get a
         # default of "None".
-        out = []
-        has_default = [
-            param.get("default", None) is not None or not param.get("required", True)
-            for param in params
-        ]
-        for i, param in enumerate(params):
-            if not has_default[i]:
-                out.append(self._serialize_parameter(param))
-        for i, param in enumerate(params):
-            if has_default[i]:
-                out.append(self._serialize_parameter(param))
+        required: List[str] = []
+        deferred: List[str] = []
+        for param in params:
+            serialized = self._serialize_parameter(param)
+            default = param.get("default", None)
+            if default is not None or not param.get("required", True):
+                deferred.append(serialized)
+            else:
+                required.append(serialized)
 
-        return ", ".join(out)
+        return ", ".join(required + deferred)
 
     def serialize_func_def(
         self, func_name: str, params: Optional[Dict], is_async: bool
@@ -182,46 +206,53 @@ class Serializer:
 
     def _serialize_param_value(self, value: Any, param: Optional[Dict]) -> str:
         t = param.get("type", None) if param else None
-        if t == "datetime" and isinstance(value, str):
-            value = value[0 : value.index("Z")]
-            d = datetime.strptime(
-                # Handle optional milliseconds.
-                value,
-                "%Y-%m-%dT%H:%M:%S.%f" if "." in value else "%Y-%m-%dT%H:%M:%S",
-            )
-            self.expected_imports.add("datetime", "timezone")
-            self.expected_imports.add("datetime", "datetime")
-            components = (
-                f"{d.year}, {d.month}, {d.day}, {d.hour}, {d.minute}, {d.second}"
-            )
-            if d.microsecond > 0:
-                components += f", {d.microsecond}"
-            return f"datetime({components}, tzinfo=timezone.utc)"
-        if t == "date" and isinstance(value, str):
-            d = datetime.fromisoformat(value)
-            self.expected_imports.add("datetime", "date")
-            return f"date({d.year}, {d.month}, {d.day})"
-        if t == "configvar":
-            if isinstance(value, str):
-                return f"airplane.ConfigVar({self._serialize(value)})"
-            if "config" in value and isinstance(value["config"], str):
-                return f"airplane.ConfigVar({self._serialize(value['config'])})"
+        serializer = self._param_value_serializers.get(t) if t else None
+        if serializer is not None:
+            return serializer(value)
+        return self._serialize(value)
 
+    def _serialize_datetime_value(self, value: Any) -> str:
+        if not isinstance(value, str):
+            return self._serialize(value)
+        d = _parse_datetime(value[0 : value.index("Z")])
+        self.expected_imports.add("datetime", "timezone")
+        self.expected_imports.add("datetime", "datetime")
+        components = f"{d.year}, {d.month}, {d.day}, {d.hour}, {d.minute}, {d.second}"
+        if d.microsecond > 0:
+            components += f", {d.microsecond}"
+        return f"datetime({components}, tzinfo=timezone.utc)"
+
+    def _serialize_date_value(self, value: Any) -> str:
+        if not isinstance(value, str):
+            return self._serialize(value)
+        d = _parse_date(value)
+        self.expected_imports.add("datetime", "date")
+        return f"date({d.year}, {d.month}, {d.day})"
+
+    def _serialize_configvar_value(self, value: Any) -> str:
+        if isinstance(value, str):
+            return f"airplane.ConfigVar({self._serialize(value)})"
+        if "config" in value and isinstance(value["config"], str):
+            return f"airplane.ConfigVar({self._serialize(value['config'])})"
         return self._serialize(value)
 
-    def _serialize_param_values(self, values: Dict, params: List[Dict]) -> str:
+    def _serialize_param_values(
+        self, values: Dict, params_by_slug: Dict[str, Dict]
+    ) -> str:
         items = []
         for slug, value in values.items():
-            param = next((p for p in params if p.get("slug") == slug), None)
+            param = params_by_slug.get(slug)
             items.append(
                 [slug, SerializedValue(self._serialize_param_value(value, param))]
             )
         return self._serialize(dict(items))
 
-    def _serialize_schedule(self, slug: str, schedule: Dict, params: List[Dict]) -> str:
+    def _serialize_schedule(
+        self, slug: str, schedule: Dict, params_by_slug: Dict[str, Dict]
+    ) -> str:
         if "paramValues" in schedule:
             schedule["paramValues"] = SerializedValue(
-                self._serialize_param_values(schedule["paramValues"], params)
+                self._serialize_param_values(schedule["paramValues"], params_by_slug)
             )
         kwargs = [
             camel_to_snake(key) + "=" + self._serialize(value)
@@ -269,9 +300,12 @@ class Serializer:
             )
 
         if "schedules" in task_def:
-            params = task_def.get("parameters", [])
+            # Index the parameters by slug, keeping the first parameter for each slug.
+            params_by_slug = {
+                p.get("slug"): p for p in reversed(task_def.get("parameters", []))
+            }
             task_def["schedules"] = [
-                SerializedValue(self._serialize_schedule(slug, s, params))
+                SerializedValue(self._serialize_schedule(slug, s, params_by_slug))
                 for slug, s in task_def["schedules"].items()
             ]
 
@@ -283,10 +317,8 @@ class Serializer:
         if task_def.get("timeout", 0) == 3600:
             task_def.pop("timeout")
 
-        # Format the generated code using black. Use a "_" as a placeholder so black doesn't
-        # error on it being invalid.
-        out = "_airplane.task(" + self._serialize_kwargs(task_def) + ")"
-        return "@" + format_code(out, self._indent)[1:]
+        out = "@airplane.task(" + self._serialize_kwargs(task_def) + ")"
+        return format_code(out, self._indent)
 
     def _serialize_kwargs(self, kwargs: Dict) -> str:
         out = []
@@ -294,39 +326,97 @@ class Serializer:
             out.append(camel_to_snake(key) + "=" + self._serialize(value))
         return ", ".join(out)
 
-    def _is_py_version_gte(self, version: str) -> bool:
+    def _is_py_version_gte(self, minor_version: int) -> bool:
         """Returns true if the version of Python used to execute the serialized code is
-        >= version."""
-        # Strip off the `3.` prefix.
-        min_version = int(version[2:])
-
-        # If the user has an airplane.yaml with a `python.version` field, that value
-        # will be passed in as `py_version`. This represents the version of Python
-        # that will execute this task once deployed. However, the serialized code also
-        # needs to work with the _current_ version of Python otherwise this code won't
-        # execute in Studio. Therefore, compare against the minimum of these versions.
-        py_version = int(self._py_version[2:]) if self._py_version else None
-        if os.getenv("TESTING_ONLY_IGNORE_CURRENT_PYTHON_VERSION") == "true":
-            if py_version is None:
-                raise ValueError("expected an airplane.yaml python version")
-        else:
-            py_version = (
-                min(py_version, sys.version_info.minor)
-                if py_version
-                else sys.version_info.minor
-            )
-
-        return py_version >= min_version
+        >= 3.{minor_version}."""
+        if self._minor_version is None:
+            raise ValueError("expected an airplane.yaml python version")
+        return self._minor_version >= minor_version
+
+
+def _parse_datetime(value: str) -> datetime:
+    """Parses a datetime formatted as YYYY-MM-DDTHH:MM:SS[.ffffff]. This avoids strptime,
+    which is slow, for the common case."""
+    m = _ISO_DATETIME.fullmatch(value)
+    if m is None:
+        return datetime.strptime(
+            # Handle optional milliseconds.
+            value,
+            "%Y-%m-%dT%H:%M:%S.%f" if "." in value else "%Y-%m-%dT%H:%M:%S",
+        )
+    year, month, day, hour, minute, second, fraction = m.groups()
+    # The datetime constructor validates the fields, as strptime would.
+    return datetime(
+        int(year),
+        int(month),
+        int(day),
+        int(hour),
+        int(minute),
+        int(second),
+        int(fraction.ljust(6, "0")) if fraction else 0,
+    )
+
+
+def _parse_date(value: str) -> Union[date, datetime]:
+    """Parses an ISO 8601 date, avoiding fromisoformat for the common YYYY-MM-DD case."""
+    m = _ISO_DATE.fullmatch(value)
+    if m is None:
+        return datetime.fromisoformat(value)
+    year, month, day = m.groups()
+    return date(int(year), int(month), int(day))
+
+
+def _get_minor_version(py_version: str) -> Optional[int]:
+    """Returns the minor version of Python that the serialized code must support, or
+    None if it is unknown."""
+    # If the user has an airplane.yaml with a `python.version` field, that value
+    # will be passed in as `py_version`. This represents the version of Python
+    # that will execute this task once deployed. However, the serialized code also
+    # needs to work with the _current_ version of Python otherwise this code won't
+    # execute in Studio. Therefore, compare against the minimum of these versions.
+    #
+    # Strip off the `3.` prefix.
+    minor_version = int(py_version[2:]) if py_version else None
+    if os.getenv("TESTING_ONLY_IGNORE_CURRENT_PYTHON_VERSION") == "true":
+        return minor_version
+    return (
+        min(minor_version, sys.version_info.minor)
+        if minor_version
+        else sys.version_info.minor
+    )
+
+
+def _format_with_black(code: str) -> str:
+    # Black can't parse a decorator without a function, so format it as an expression of
+    # the same length and restore the "@" afterwards.
+    is_decorator = code.startswith("@")
+    if is_decorator:
+        code = "_" + code[1:]
+    formatted = black.format_str(code, mode=_BLACK_MODE)
+    if is_decorator:
+        formatted = "@" + formatted[1:]
+    # Black will append a newline. Remove it.
+    return formatted[0:-1]
 
 
+@functools.lru_cache(maxsize=256)
 def format_code(code: str, indent: str) -> str:
     """
-    Formats a chunk of valid Python code. This requires black, which we package
-    inline (via PEX) so that users don't need it installed.
+    Formats a chunk of valid Python code, as black would.
+
+    The code is formatted with a lightweight formatter that supports the subset of Python
+    generated by the serializer. If that fails, or if AIRPLANE_UPDATER_USE_BLACK=true,
+    this falls back to black, which we package inline (via PEX) so that users don't need
+    it installed.
     """
-    formatted = black.format_str(code, mode=black.Mode())
-    # Black will append a newline. Remove it.
-    formatted = formatted[0:-1]
+    formatted = None
+    if os.getenv("AIRPLANE_UPDATER_USE_BLACK") != "true":
+        try:
+            formatted = pretty.format_code(code)
+        except ValueError:
+            pass
+    if formatted is None:
+        formatted = _format_with_black(code)
 
     lines = [
         # Replace the indentation in the formatted code (which will always be 4 spaces)
@@ -1,13 +1,12 @@
 import ast
 import json
-import re
 import sys
 import traceback
 from typing import Any, Dict
 
 from exceptions import TaskNotFound
-from location import Location
-from parse import Parser
+from location import LineIndex, Location
+from parse import Parser, may_contain_task
 from serialize import Serializer
 from utils import apply_updates, get_indent
 
@@ -23,6 +22,8 @@ def update(
 
     with open(file, "r", encoding="utf-8") as f:
         content = f.read()
+        if not may_contain_task(content):
+            raise TaskNotFound(slug)
         root = ast.parse(content, filename=file)
 
         p = Parser(slug, content)
@@ -68,21 +69,20 @@ def get_import_loc(content: str, root: ast.Module) -> Location:
     docs = ast.get_docstring(root)
     if docs:
         i = content.index(docs)
-        m = re.match(r'^(^.*?""")', content[i:], flags=re.DOTALL)
-        if m:
-            i += len(m.group(0))
-            lineno = len(content[0:i].split("\n"))
+        end = content.find('"""', i)
+        if end != -1:
+            i = end + len('"""')
+            lineno = content.count("\n", 0, i) + 1
 
     # Skip past lines that have a comment.
-    lines = content.split("\n")
-    for i, line in enumerate(lines, start=lineno):
-        if re.match(r"^($|(?!#).*$)", line):
+    index = LineIndex(content)
+    for i, line in enumerate(index.lines, start=lineno):
+        if not line.startswith("#"):
             lineno = i
             break
 
-    return Location(
-        Location.offset(content, lineno, 0), Location.offset(content, lineno, 0)
-    )
+    offset = index.offset(lineno, 0)
+    return Location(offset, offset)
 
 
 def main() -> None:
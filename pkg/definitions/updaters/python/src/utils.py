@@ -1,7 +1,9 @@
 import dataclasses
+import functools
 import re
-from collections import defaultdict
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import inflection
 
 from location import Location
 
@@ -9,23 +11,26 @@ from location import Location
 @dataclasses.dataclass()
 class Import:
     direct: bool = False
-    includes: List[str] = dataclasses.field(default_factory=lambda: [])
+    includes: Set[str] = dataclasses.field(default_factory=set)
 
 
 class Imports:
     def __init__(self) -> None:
-        self.imports: Dict[str, Import] = defaultdict(Import)
+        self.imports: Dict[str, Import] = {}
 
     def add(self, module: str, include: Optional[str] = None) -> None:
-        imp = self.imports[module]
-        self.imports[module].direct = imp.direct or include is None
-        if include and include not in imp.includes:
-            self.imports[module].includes.append(include)
+        imp = self.imports.get(module)
+        if imp is None:
+            imp = Import()
+            self.imports[module] = imp
+        imp.direct = imp.direct or include is None
+        if include:
+            imp.includes.add(include)
 
     def has(self, module: str, include: Optional[str] = None) -> bool:
-        if module not in self.imports:
+        imp = self.imports.get(module)
+        if imp is None:
             return False
-        imp = self.imports[module]
         if include is None:
             return imp.direct
         return include in imp.includes
@@ -40,14 +45,37 @@ def get_indent(content: str) -> str:
 
 
 def insert_after(d: Dict, key: str, new_key: str, new_value: Any) -> Dict:
-    idx = list(d.keys()).index(key)
-    items = list(d.items())
-    items.insert(idx, (new_key, new_value))
-    return dict(items)
+    """Returns a copy of d with new_key inserted immediately after key."""
+    out = {}
+    for k, v in d.items():
+        out[k] = v
+        if k == key:
+            out[new_key] = new_value
+    return out
+
 
+_CAMEL_CASE_BOUNDARY = re.compile(r"(?<!^)(?=[A-Z])")
 
+
+# The set of keys that are converted is small (task and schedule fields), so cache them.
+@functools.lru_cache(maxsize=256)
 def camel_to_snake(s: str) -> str:
-    return re.sub(r"(?<!^)(?=[A-Z])", "_", s).lower()
+    return _CAMEL_CASE_BOUNDARY.sub("_", s).lower()
+
+
+_SIMPLE_SLUG = re.compile(r"[A-Za-z0-9_]*")
+
+
+@functools.lru_cache(maxsize=512)
+def humanize(slug: str) -> str:
+    """Equivalent to inflection.humanize (e.g. "user_id" becomes "User"), but avoids its
+    regexes for slugs made up of ASCII letters, digits and underscores."""
+    if not _SIMPLE_SLUG.fullmatch(slug):
+        return inflection.humanize(slug)
+    if slug.endswith("_id"):
+        slug = slug[: -len("_id")]
+    word = slug.replace("_", " ").lower()
+    return word[:1].upper() + word[1:]
 
 
 def apply_updates(content: str, updates: List[Tuple[Location, str]]) -> str:
@@ -60,8 +88,14 @@ def apply_updates(content: str, updates: List[Tuple[Location, str]]) -> str:
             # mucking up the user's file.
             assert update[0].start >= updates[i - 1][0].end
 
-    # Apply updates in reverse order so that the indexes of prior updates are not impacted.
-    for loc, value in reversed(updates):
-        content = content[0 : loc.start] + value + content[loc.end :]
-
-    return content
+    # Stitch the updates together with the unchanged content in between them, so that
+    # the content is only copied once.
+    out = []
+    cur = 0
+    for loc, value in updates:
+        out.append(content[cur : loc.start])
+        out.append(value)
+        cur = loc.end
+    out.append(content[cur:])
+
+    return "".join(out)
@@ -132,6 +132,7 @@ func TestUpdatePythonTask(t *testing.T) {
 				Slug: "my_task",
 				Constraints: map[string]string{
 					"a_valid_identifier": "...",
+					"back\\slash":        "C:\\path",
 					"double\"":           "\"",
 					"single'":            "'",
 					"both'\"'\"":         "'\"'\"",
@@ -367,6 +368,22 @@ func TestUpdatePythonTask(t *testing.T) {
 				},
 			},
 		},
+		{
+			// Tests the case where a single import statement includes multiple names. None of
+			// them should be imported again.
+			name: "multiple_imports",
+			slug: "my_task",
+			def: definitions.Definition{
+				Slug: "my_task",
+				Parameters: []definitions.ParameterDefinition{
+					{
+						Slug: "name",
+						Type: "shorttext",
+						Name: "User name",
+					},
+				},
+			},
+		},
 		{
 			// Tests the case where a file has multiple decorators.
 			name: "decorators",
@@ -582,6 +599,11 @@ func TestCanUpdatePythonTask(t *testing.T) {
 			slug:      "good",
 			canUpdate: true,
 		},
+		{
+			// The slug never appears verbatim in the file.
+			slug:      "concatenated_slug",
+			canUpdate: true,
+		},
 	}
 	for _, tC := range testCases {
 		tC := tC // rebind for parallel tests
@@ -0,0 +1,86 @@
+import dataclasses
+import inspect
+from typing import Any, Callable, List, Optional
+
+
+# Inlined partial airplanesdk library so the parser works properly. If the SDK
+# is installed, it takes precedence over this module.
+@dataclasses.dataclass
+class ParamDef:
+    arg_name: str
+    slug: str
+    name: str
+    type: Any
+    description: Optional[str]
+    default: Optional[Any]
+    required: Optional[bool]
+    options: Optional[Any]
+    regex: Optional[str]
+
+
+@dataclasses.dataclass
+class TaskDef:
+    func: Callable[..., Any]
+    slug: str
+    name: str
+    runtime: Any
+    entrypoint_func: str
+    description: Optional[str]
+    require_requests: Optional[bool]
+    allow_self_approvals: Optional[bool]
+    restrict_callers: Optional[List[str]]
+    timeout: Optional[int]
+    concurrency_key: Optional[str]
+    concurrency_limit: Optional[int]
+    constraints: Optional[Any]
+    resources: Optional[List[Any]]
+    schedules: Optional[List[Any]]
+    parameters: Optional[List[ParamDef]]
+    env_vars: Optional[Any]
+
+
+_PARAM_TYPES = {int: "integer", str: "shorttext", bool: "boolean"}
+
+
+def task(slug: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        parameters = [
+            ParamDef(
+                arg_name=p.name,
+                slug=p.name,
+                name=p.name,
+                type=_PARAM_TYPES[p.annotation],
+                description=None,
+                default=None if p.default is p.empty else p.default,
+                required=p.default is p.empty,
+                options=None,
+                regex=None,
+            )
+            for p in inspect.signature(func).parameters.values()
+        ]
+        setattr(
+            func,
+            "__airplane",
+            TaskDef(
+                func=func,
+                slug=slug,
+                name=func.__name__,
+                runtime="",
+                entrypoint_func=func.__name__,
+                description=None,
+                require_requests=False,
+                allow_self_approvals=True,
+                restrict_callers=None,
+                timeout=3600,
+                concurrency_key=None,
+                concurrency_limit=None,
+                constraints=None,
+                resources=None,
+                schedules=None,
+                parameters=parameters,
+                env_vars=None,
+            ),
+        )
+        return func
+
+    return decorator
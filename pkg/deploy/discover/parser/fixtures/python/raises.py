@@ -0,0 +1,8 @@
+class TaskSetupError(Exception):
+    # Exceptions whose constructor arguments differ from their args can't be
+    # unpickled.
+    def __init__(self, reason: str, code: int):
+        super().__init__(f"{reason} ({code})")
+
+
+raise TaskSetupError("missing API key", 42)
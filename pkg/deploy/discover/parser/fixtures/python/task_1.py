@@ -0,0 +1,11 @@
+import airplane
+
+
+@airplane.task(slug="task_1_a")
+def task_1_a(count: int = 1) -> int:
+    return count
+
+
+@airplane.task(slug="task_1_b")
+def task_1_b(name: str) -> str:
+    return name
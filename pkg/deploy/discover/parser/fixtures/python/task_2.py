@@ -0,0 +1,11 @@
+import airplane
+
+
+@airplane.task(slug="task_2_a")
+def task_2_a(count: int = 2) -> int:
+    return count
+
+
+@airplane.task(slug="task_2_b")
+def task_2_b(name: str) -> str:
+    return name
@@ -0,0 +1,11 @@
+import airplane
+
+
+@airplane.task(slug="task_3_a")
+def task_3_a(count: int = 3) -> int:
+    return count
+
+
+@airplane.task(slug="task_3_b")
+def task_3_b(name: str) -> str:
+    return name
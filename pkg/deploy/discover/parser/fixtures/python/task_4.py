@@ -0,0 +1,11 @@
+import airplane
+
+
+@airplane.task(slug="task_4_a")
+def task_4_a(count: int = 4) -> int:
+    return count
+
+
+@airplane.task(slug="task_4_b")
+def task_4_b(name: str) -> str:
+    return name
@@ -0,0 +1,11 @@
+import airplane
+
+
+@airplane.task(slug="task_5_a")
+def task_5_a(count: int = 5) -> int:
+    return count
+
+
+@airplane.task(slug="task_5_b")
+def task_5_b(name: str) -> str:
+    return name
@@ -0,0 +1,81 @@
+package parser
+
+import (
+	"encoding/json"
+	"fmt"
+	"os"
+	"os/exec"
+	"strings"
+	"testing"
+
+	"github.com/stretchr/testify/require"
+)
+
+var pythonTaskFixtures = []string{
+	"fixtures/python/task_1.py",
+	"fixtures/python/task_2.py",
+	"fixtures/python/task_3.py",
+	"fixtures/python/task_4.py",
+	"fixtures/python/task_5.py",
+}
+
+// runPythonParser runs the Python parser over files with the given number of
+// worker processes: 1 executes the files serially, more forks workers.
+func runPythonParser(workers int, files ...string) ([]byte, error) {
+	cmd := exec.Command("python3", append([]string{"-c", PythonParserScript}, files...)...)
+	cmd.Env = append(os.Environ(), fmt.Sprintf("AIRPLANE_DISCOVERY_WORKERS=%d", workers))
+	return cmd.CombinedOutput()
+}
+
+func TestPythonParserParallel(t *testing.T) {
+	require := require.New(t)
+
+	serial, err := runPythonParser(1, pythonTaskFixtures...)
+	require.NoError(err, string(serial))
+	parallel, err := runPythonParser(2, pythonTaskFixtures...)
+	require.NoError(err, string(parallel))
+	require.Equal(string(serial), string(parallel))
+
+	out, ok := strings.CutPrefix(strings.TrimSpace(string(parallel)), "EXTRACTED_ENTITY_CONFIGS:")
+	require.True(ok, string(parallel))
+	var configs []struct {
+		EntrypointFunc string `json:"entrypointFunc"`
+		Slug           string `json:"slug"`
+		Parameters     []struct {
+			Slug    string      `json:"slug"`
+			Default interface{} `json:"default"`
+		} `json:"parameters"`
+		Python struct {
+			Entrypoint string `json:"entrypoint"`
+		} `json:"python"`
+	}
+	require.NoError(json.Unmarshal([]byte(out), &configs))
+
+	// Configs are returned in the order of the files, then of the tasks in each file.
+	require.Len(configs, 2*len(pythonTaskFixtures))
+	for i, file := range pythonTaskFixtures {
+		a, b := configs[2*i], configs[2*i+1]
+		require.Equal(fmt.Sprintf("task_%d_a", i+1), a.Slug)
+		require.Equal(fmt.Sprintf("task_%d_a", i+1), a.EntrypointFunc)
+		require.Equal(file, a.Python.Entrypoint)
+		require.Len(a.Parameters, 1)
+		require.Equal("count", a.Parameters[0].Slug)
+		require.EqualValues(i+1, a.Parameters[0].Default)
+
+		require.Equal(fmt.Sprintf("task_%d_b", i+1), b.Slug)
+		require.Equal(fmt.Sprintf("task_%d_b", i+1), b.EntrypointFunc)
+		require.Equal(file, b.Python.Entrypoint)
+		require.Len(b.Parameters, 1)
+		require.Equal("name", b.Parameters[0].Slug)
+		require.Nil(b.Parameters[0].Default)
+	}
+}
+
+func TestPythonParserReportsErrorsFromWorkers(t *testing.T) {
+	require := require.New(t)
+
+	out, err := runPythonParser(2, append(pythonTaskFixtures, "fixtures/python/raises.py")...)
+	require.Error(err)
+	require.Contains(string(out), "Unable to discover tasks in fixtures/python/raises.py")
+	require.Contains(string(out), "TaskSetupError: missing API key (42)")
+}
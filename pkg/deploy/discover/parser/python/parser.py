@@ -1,20 +1,57 @@
+import concurrent.futures
 import dataclasses
+import functools
 import importlib.util
 import inspect
+import itertools
 import json
+import multiprocessing
 import os
 import sys
-from typing import Any, Dict, List, Literal, Optional, Union
+import traceback
+from types import ModuleType
+from typing import Any, Dict, List, Literal, Optional, Set, Tuple, Union
 
+try:
+    from airplane import LabeledOption
+except ImportError:
+    # The SDK is missing or predates LabeledOption.
+    LabeledOption = None
 
+
+def _is_labeled_option(o: Any) -> bool:
+    if LabeledOption is None:
+        return hasattr(o, "label")
+    return isinstance(o, LabeledOption)
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str else value
+
+
+# These dataclasses declare __slots__ by hand, rather than with slots=True,
+# which requires Python 3.10.
 @dataclasses.dataclass
 class Option:
+    __slots__ = ("label", "value")
+
     label: str
     value: Any
 
 
 @dataclasses.dataclass
 class Param:
+    __slots__ = (
+        "slug",
+        "name",
+        "type",
+        "description",
+        "default",
+        "required",
+        "options",
+        "regex",
+    )
+
     slug: str
     name: str
     type: str
@@ -24,9 +61,17 @@ class Param:
     options: Union[List[Option], List[str], None]
     regex: Optional[str]
 
+    def __post_init__(self) -> None:
+        # Slugs, names and types repeat across tasks, so share one copy of each.
+        self.slug = _intern(self.slug)
+        self.name = _intern(self.name)
+        self.type = _intern(self.type)
+
 
 @dataclasses.dataclass
 class Schedule:
+    __slots__ = ("name", "description", "cron", "paramValues")
+
     name: Optional[str]
     description: Optional[str]
     cron: str
@@ -35,23 +80,49 @@ class Schedule:
 
 @dataclasses.dataclass
 class EnvVar:
+    __slots__ = ("value", "config")
+
     value: Optional[str]
     config: Optional[str]
 
 
 @dataclasses.dataclass
 class PythonDef:
+    __slots__ = ("envVars", "entrypoint")
+
     envVars: Optional[Dict[str, EnvVar]]
     entrypoint: str
 
 
 @dataclasses.dataclass
 class Def:
+    __slots__ = (
+        "entrypointFunc",
+        "name",
+        "slug",
+        "description",
+        "parameters",
+        "resources",
+        "constraints",
+        "python",
+        "requireRequests",
+        "allowSelfApprovals",
+        "restrictCallers",
+        "timeout",
+        "runtime",
+        "default_run_permissions",
+        "concurrencyKey",
+        "concurrencyLimit",
+        "schedules",
+    )
+
     entrypointFunc: str
 
     name: str
     slug: str
     description: Optional[str]
+    # Parameters, resources, schedules and env vars are emitted even when they
+    # are empty, since the CLI's definitions distinguish empty from missing.
     parameters: List[Param]
     resources: Optional[Dict[str, str]]
 
@@ -69,109 +140,235 @@ class Def:
     schedules: Dict[str, Schedule]
 
 
+@functools.lru_cache(maxsize=None)
+def _field_names(cls: type) -> Tuple[str, ...]:
+    return tuple(f.name for f in dataclasses.fields(cls))
+
+
 def as_def(obj: Any) -> Union[Any, Dict[str, Any]]:
+    """Converts dataclasses into dicts, recursively, omitting fields that are
+    None. This avoids dataclasses.asdict, which looks up the fields of every
+    instance and deep copies every value."""
     if dataclasses.is_dataclass(obj):
-        return dataclasses.asdict(
-            obj,
-            dict_factory=lambda kv: {k: as_def(v)
-                                     for (k, v) in kv if v is not None},
-        )
+        out = {}
+        for name in _field_names(type(obj)):
+            value = getattr(obj, name)
+            if value is not None:
+                out[name] = as_def(value)
+        return out
+    if isinstance(obj, (list, tuple)):
+        return [as_def(v) for v in obj]
+    if isinstance(obj, dict):
+        return {k: as_def(v) for k, v in obj.items()}
     return obj
 
 
-def extract_task_configs(files: List[str]) -> List[Def]:
-    defs: List[Def] = []
+_module_ids = itertools.count()
 
-    for file in files:
-        sys.path.append(os.path.dirname(file))
-        spec = importlib.util.spec_from_file_location(
-            "airplane_task_import", file)
-        assert spec is not None, f"Unable to import module {file}"
-        assert spec.loader is not None, f"Unable to construct loader for module {file}"
-        module = importlib.util.module_from_spec(spec)
+
+def _load_module(file: str) -> ModuleType:
+    # Give each file its own module name, so that modules don't clobber each
+    # other in sys.modules.
+    spec = importlib.util.spec_from_file_location(
+        f"airplane_task_import_{next(_module_ids)}", file)
+    assert spec is not None, f"Unable to import module {file}"
+    assert spec.loader is not None, f"Unable to construct loader for module {file}"
+    module = importlib.util.module_from_spec(spec)
+    # Register the module before executing it, as the import system does, since
+    # some code (e.g. dataclasses) looks up its module in sys.modules.
+    sys.modules[spec.name] = module
+    try:
         spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[spec.name]
+        raise
+    return module
 
-        for name, obj in vars(module).items():
-            if callable(obj) and hasattr(obj, "__airplane"):
-                conf = obj.__airplane
-                # Only select tasks that were defined in the file, not imported.
-                if inspect.getabsfile(conf.func) != os.path.normcase(os.path.abspath(file)):
-                    continue
-                defs.append(
-                    Def(
-                        entrypointFunc=name,
-                        name=conf.name,
-                        slug=conf.slug,
-                        description=conf.description,
-                        parameters=[
-                            Param(
-                                slug=param.slug,
-                                name=param.name,
-                                type=param.type,
-                                description=param.description,
-                                default=param.default,
-                                required=param.required,
-                                options=[
-                                    Option(label=o.label, value=o.value)
-                                    if hasattr(o, "label")
-                                    else o
-                                    for o in param.options or []
-                                ],
-                                regex=param.regex,
-                            )
-                            for param in conf.parameters
-                        ],
-                        resources={
-                            r.alias or r.slug: r.slug for r in conf.resources or []
-                        },
-                        constraints=conf.constraints,
-                        requireRequests=conf.require_requests,
-                        allowSelfApprovals=conf.allow_self_approvals,
-                        restrictCallers=conf.restrict_callers if hasattr(
-                            conf, "restrict_callers") else None,
-                        timeout=conf.timeout,
-                        runtime=conf.runtime,
-                        default_run_permissions=conf.default_run_permissions if hasattr(
-                            conf, "default_run_permissions") else None,
-                        concurrencyKey=conf.concurrency_key if hasattr(
-                            conf, "concurrency_key") else "",
-                        concurrencyLimit=conf.concurrency_limit if hasattr(
-                            conf, "concurrency_limit") else 1,
-                        schedules={
-                            s.slug: Schedule(
-                                name=s.name,
-                                description=s.description,
-                                cron=s.cron,
-                                paramValues=s.param_values,
+
+@functools.lru_cache(maxsize=None)
+def _abs_path(path: str) -> str:
+    # Equal paths are returned as the same (interned) object, so comparing them
+    # is an identity check.
+    return sys.intern(os.path.normcase(os.path.abspath(path)))
+
+
+def _source_file(func: Any) -> str:
+    """Returns the normalized absolute path of the file that defines func. This
+    is equivalent to inspect.getabsfile, without the filesystem lookups it does
+    to find the source file of Python functions."""
+    code = getattr(func, "__code__", None)
+    if code is None:
+        return inspect.getabsfile(func)
+    return _abs_path(code.co_filename)
+
+
+def _add_to_path(file: str, path_dirs: Set[str]) -> None:
+    # Only add each directory to the path once: every import scans sys.path.
+    file_dir = os.path.dirname(file)
+    if file_dir not in path_dirs:
+        sys.path.append(file_dir)
+        path_dirs.add(file_dir)
+
+
+def _extract_file(file: str) -> List[Def]:
+    defs: List[Def] = []
+    module = _load_module(file)
+
+    file_key = _abs_path(file)
+    for name, obj in vars(module).items():
+        if not callable(obj):
+            continue
+        conf = getattr(obj, "__airplane", None)
+        if conf is not None:
+            # Only select tasks that were defined in the file, not imported.
+            if _source_file(conf.func) != file_key:
+                continue
+            defs.append(
+                Def(
+                    entrypointFunc=name,
+                    name=conf.name,
+                    slug=conf.slug,
+                    description=conf.description,
+                    parameters=[
+                        Param(
+                            slug=param.slug,
+                            name=param.name,
+                            type=param.type,
+                            description=param.description,
+                            default=param.default,
+                            required=param.required,
+                            options=[
+                                Option(label=o.label, value=o.value)
+                                if _is_labeled_option(o)
+                                else o
+                                for o in param.options
+                            ] if param.options else [],
+                            regex=param.regex,
+                        )
+                        for param in conf.parameters
+                    ] if conf.parameters else [],
+                    resources={
+                        r.alias or r.slug: r.slug for r in conf.resources
+                    } if conf.resources else {},
+                    constraints=conf.constraints,
+                    requireRequests=conf.require_requests,
+                    allowSelfApprovals=conf.allow_self_approvals,
+                    restrictCallers=conf.restrict_callers if hasattr(
+                        conf, "restrict_callers") else None,
+                    timeout=conf.timeout,
+                    runtime=conf.runtime,
+                    default_run_permissions=conf.default_run_permissions if hasattr(
+                        conf, "default_run_permissions") else None,
+                    concurrencyKey=conf.concurrency_key if hasattr(
+                        conf, "concurrency_key") else "",
+                    concurrencyLimit=conf.concurrency_limit if hasattr(
+                        conf, "concurrency_limit") else 1,
+                    schedules={
+                        _intern(s.slug): Schedule(
+                            name=s.name,
+                            description=s.description,
+                            cron=s.cron,
+                            paramValues=s.param_values,
+                        )
+                        for s in conf.schedules
+                    } if conf.schedules else {},
+                    python=PythonDef(
+                        envVars={
+                            _intern(e.name): EnvVar(
+                                value=e.value,
+                                config=e.config_var_name,
                             )
-                            for s in conf.schedules or []
-                        },
-                        python=PythonDef(
-                            envVars={
-                                e.name: EnvVar(
-                                    value=e.value,
-                                    config=e.config_var_name,
-                                )
-                                for e in conf.env_vars or []
-                            },
-                            entrypoint=file,
-                        ),
-                    )
+                            for e in conf.env_vars
+                        } if conf.env_vars else {},
+                        entrypoint=file,
+                    ),
                 )
+            )
+
+    return defs
+
+
+def extract_task_configs(files: List[str]) -> List[Def]:
+    defs: List[Def] = []
+    path_dirs = set(sys.path)
+
+    for file in files:
+        _add_to_path(file, path_dirs)
+        defs.extend(_extract_file(file))
+
+    return defs
 
+
+# Below this many files, starting worker processes costs more than it saves.
+_MIN_PARALLEL_FILES = 5
+
+
+def _max_workers(files: List[str]) -> int:
+    # AIRPLANE_DISCOVERY_WORKERS overrides the number of CPUs, so that tests can
+    # exercise the serial (1) and parallel paths regardless of the machine.
+    workers = os.getenv("AIRPLANE_DISCOVERY_WORKERS")
+    return min(int(workers) if workers else os.cpu_count() or 1, len(files))
+
+
+def _extract_file_in_worker(file: str) -> Tuple[bool, str]:
+    """Runs _extract_file in a worker process, returning either the file's
+    serialized configs or the traceback of the exception it raised.
+
+    Neither exceptions raised by task code nor the values in configs can be
+    relied on to pickle back to the parent process, so only strings are sent."""
+    try:
+        return True, json.dumps([as_def(config) for config in _extract_file(file)])
+    except BaseException:
+        return False, traceback.format_exc()
+
+
+def extract_task_configs_parallel(files: List[str]) -> List[Any]:
+    """Like extract_task_configs, but executes the files in worker processes
+    and returns the configs as converted by as_def.
+
+    Workers are forked so that they inherit this process's sys.path, which
+    includes /airplane/ and the directories of all of the files. Where fork
+    isn't available, files are executed serially.
+
+    Unlike in extract_task_configs, modules that the files import (e.g. a
+    shared helpers module) are executed once per worker rather than once in
+    total, so their module-level side effects can repeat."""
+    max_workers = _max_workers(files)
+    if (
+        len(files) < _MIN_PARALLEL_FILES
+        or max_workers < 2
+        or "fork" not in multiprocessing.get_all_start_methods()
+    ):
+        return [as_def(config) for config in extract_task_configs(files)]
+
+    # When run serially, each file can import from the directories of the files
+    # before it, so add all of them before forking.
+    path_dirs = set(sys.path)
+    for file in files:
+        _add_to_path(file, path_dirs)
+    # Don't let the workers inherit (and re-print) buffered output.
+    sys.stdout.flush()
+    sys.stderr.flush()
+    defs: List[Any] = []
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context("fork")
+    ) as executor:
+        results = executor.map(_extract_file_in_worker, files, chunksize=4)
+        for file, (ok, result) in zip(files, results):
+            if not ok:
+                raise RuntimeError(f"Unable to discover tasks in {file}:\n{result}")
+            defs.extend(json.loads(result))
     return defs
 
 
 def main() -> None:
     # Add the task root to the sys path. This will have no effect for local dev but will allow
     # discovered modules to properly import their dependencies during deployments.
-    sys.path.append("/airplane/")
+    if "/airplane/" not in sys.path:
+        sys.path.append("/airplane/")
     files = sys.argv[1:]
-    task_configs = extract_task_configs(files)
-    print(
-        "EXTRACTED_ENTITY_CONFIGS:"
-        + json.dumps([as_def(config) for config in task_configs])
-    )
+    task_configs = extract_task_configs_parallel(files)
+    print("EXTRACTED_ENTITY_CONFIGS:" + json.dumps(task_configs))
 
 
 if __name__ == "__main__":
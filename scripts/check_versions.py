@@ -7,6 +7,7 @@
     upstream images, but they should match for any new images that you're adding.
 """
 
+import concurrent.futures
 import json
 import logging
 import logging.config
@@ -25,39 +26,58 @@ VERSIONS_PATH = os.path.join(
     '../pkg/build/versions.json',
 )
 
+# Each check is a slow registry request, so run several of them at a time.
+MAX_WORKERS = 16
+
 
 def main():
     with open(VERSIONS_PATH) as versions_file:
         versions_json = json.load(versions_file)
 
-        for img_type, versions in versions_json.items():
-            for version, image in versions.items():
-                tag = image['tag']
-
-                uri = f'docker.io/{img_type}:{tag}'
-                file_digest = image['digest']
-                registry_digest = get_digest(uri)
+    img_types = []
+    images = []
+    for img_type, versions in versions_json.items():
+        for image in versions.values():
+            img_types.append(img_type)
+            images.append(image)
 
-                if file_digest != registry_digest:
-                    logging.warning(
-                        f'Mismatched digest for {uri}: expected {registry_digest}, got {file_digest}',
-                    )
-                else:
-                    logging.info(f'Digest for {uri} ok')
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        # Log the results in order, rather than as the checks finish.
+        for level, message in executor.map(check_one, img_types, images):
+            logging.log(level, message)
 
     logging.info('Done!')
 
 
+def check_one(img_type, image):
+    """Check the digest of an image, returning a log level and message."""
+    tag = image['tag']
+
+    uri = f'docker.io/{img_type}:{tag}'
+    file_digest = image['digest']
+    registry_digest = get_digest(uri)
+
+    if file_digest != registry_digest:
+        return (
+            logging.WARNING,
+            f'Mismatched digest for {uri}: expected {registry_digest}, got {file_digest}',
+        )
+    return logging.INFO, f'Digest for {uri} ok'
+
+
 def get_digest(uri):
     """Get the digest for a multi-platform image."""
-    result = subprocess.check_output(
-        ['docker', 'buildx', 'imagetools', 'inspect', uri],
-    ).decode('utf-8')
-
-    for row in result.split('\n'):
-        if row.startswith('Digest:'):
-            digest = row.split(' ')[-1]
-            return digest
+    args = ['docker', 'buildx', 'imagetools', 'inspect', uri]
+    with subprocess.Popen(args, stdout=subprocess.PIPE, encoding='utf-8') as proc:
+        # Stop reading as soon as the digest is printed, rather than waiting for the
+        # rest of the (potentially long) output.
+        for row in proc.stdout:
+            if row.startswith('Digest:'):
+                digest = row.rstrip('\n').split(' ')[-1]
+                return digest
+
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, args)
 
     return None
 
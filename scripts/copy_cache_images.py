@@ -5,6 +5,7 @@
     is in our public cache in both stage and prod.
 """
 
+import concurrent.futures
 import json
 import logging
 import logging.config
@@ -23,29 +24,43 @@ VERSIONS_PATH = os.path.join(
     '../pkg/build/versions.json',
 )
 
+# Each copy is a slow registry request, so run several of them at a time.
+MAX_WORKERS = 16
+
 
 def main():
     with open(VERSIONS_PATH) as versions_file:
         versions_json = json.load(versions_file)
 
-        for img_type, versions in versions_json.items():
-            for version, image in versions.items():
-                tag = image['tag']
-                digest = image['digest']
-
-                logging.info(f'Copying {img_type}:{tag}')
-                subprocess.check_output([
-                    'docker',
-                    'buildx',
-                    'imagetools',
-                    'create',
-                    '-t', f'us-central1-docker.pkg.dev/airplane-stage/public-cache/{img_type}:{tag}',
-                    '-t', f'us-central1-docker.pkg.dev/airplane-prod/public-cache/{img_type}:{tag}',
-                    f'docker.io/{img_type}@{digest}',
-                ])
+    img_types = []
+    images = []
+    for img_type, versions in versions_json.items():
+        for image in versions.values():
+            img_types.append(img_type)
+            images.append(image)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        # Consume the results so that any failed copy is raised.
+        list(executor.map(copy_one, img_types, images))
 
     logging.info('Done')
 
 
+def copy_one(img_type, image):
+    tag = image['tag']
+    digest = image['digest']
+
+    logging.info(f'Copying {img_type}:{tag}')
+    subprocess.check_output([
+        'docker',
+        'buildx',
+        'imagetools',
+        'create',
+        '-t', f'us-central1-docker.pkg.dev/airplane-stage/public-cache/{img_type}:{tag}',
+        '-t', f'us-central1-docker.pkg.dev/airplane-prod/public-cache/{img_type}:{tag}',
+        f'docker.io/{img_type}@{digest}',
+    ])
+
+
 if __name__ == '__main__':
     main()